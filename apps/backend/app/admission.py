@@ -0,0 +1,217 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, retry_after: int, reason: str) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class Lane:
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int, max_wait_s: float) -> None:
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.wait_total_s = 0.0
+        self.service_ewma_s = 1.0
+
+    def has_room(self) -> bool:
+        return self.active < self.max_concurrency
+
+    def retry_after(self) -> int:
+        # Rough time for the current backlog to drain, in whole seconds.
+        backlog = len(self.waiters) + self.active
+        estimate = self.service_ewma_s * backlog / max(1, self.max_concurrency)
+        return max(1, min(60, math.ceil(estimate)))
+
+    def metrics(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "avg_wait_ms": round(self.wait_total_s / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "avg_service_ms": round(self.service_ewma_s * 1000, 2),
+        }
+
+
+# All lanes share `capacity` slots (the embedding model and the DB pool). When a
+# slot frees up, waiters in the lane with the lowest priority number are admitted
+# first, subject to each lane's own concurrency cap. Requests are shed with 429
+# when their lane queue is full and 503 when they waited longer than allowed.
+class AdmissionController:
+    def __init__(self, capacity: int, lanes: list[Lane]) -> None:
+        self.capacity = capacity
+        self.active = 0
+        self.lanes = {lane.name: lane for lane in lanes}
+        self._by_priority = sorted(lanes, key=lambda lane: lane.priority)
+
+    def _can_admit_now(self, lane: Lane) -> bool:
+        if self.active >= self.capacity or not lane.has_room() or lane.waiters:
+            return False
+        # Strict priority: do not jump ahead of waiters in a more important lane.
+        return not any(other.waiters for other in self._by_priority if other.priority < lane.priority)
+
+    def _admit(self, lane: Lane, waited: float) -> None:
+        self.active += 1
+        lane.active += 1
+        lane.admitted += 1
+        lane.wait_total_s += waited
+
+    def _dispatch(self) -> None:
+        for lane in self._by_priority:
+            while lane.waiters and lane.has_room() and self.active < self.capacity:
+                waiter = lane.waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(time.monotonic())
+                    self.active += 1
+                    lane.active += 1
+            if self.active >= self.capacity:
+                return
+
+    async def acquire(self, lane: Lane) -> None:
+        started = time.monotonic()
+        if self._can_admit_now(lane):
+            self._admit(lane, 0.0)
+            return
+        if len(lane.waiters) >= lane.max_queue:
+            lane.shed_queue_full += 1
+            raise Rejected(429, lane.retry_after(), f"{lane.name} queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=lane.max_wait_s)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Admitted in the same tick the timeout fired; keep the slot.
+                pass
+            else:
+                waiter.cancel()
+                lane.waiters.remove(waiter)
+                lane.shed_timeout += 1
+                raise Rejected(503, lane.retry_after(), f"{lane.name} queue wait exceeded {lane.max_wait_s}s")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane, None)
+            else:
+                waiter.cancel()
+                if waiter in lane.waiters:
+                    lane.waiters.remove(waiter)
+            raise
+        lane.admitted += 1
+        lane.wait_total_s += time.monotonic() - started
+
+    def release(self, lane: Lane, service_s: Optional[float]) -> None:
+        self.active -= 1
+        lane.active -= 1
+        if service_s is not None:
+            lane.service_ewma_s = 0.8 * lane.service_ewma_s + 0.2 * service_s
+        self._dispatch()
+
+    def metrics(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "lanes": {name: lane.metrics() for name, lane in self.lanes.items()},
+        }
+
+
+def default_controller() -> AdmissionController:
+    return AdmissionController(
+        capacity=_env_int("ADMISSION_CAPACITY", 8),
+        lanes=[
+            Lane(
+                "chat",
+                priority=0,
+                max_concurrency=_env_int("CHAT_MAX_CONCURRENCY", 8),
+                max_queue=_env_int("CHAT_MAX_QUEUE", 64),
+                max_wait_s=_env_float("CHAT_MAX_WAIT_S", 5.0),
+            ),
+            Lane(
+                "ingest",
+                priority=1,
+                max_concurrency=_env_int("INGEST_MAX_CONCURRENCY", 2),
+                max_queue=_env_int("INGEST_MAX_QUEUE", 16),
+                max_wait_s=_env_float("INGEST_MAX_WAIT_S", 30.0),
+            ),
+        ],
+    )
+
+
+def lane_for(path: str, method: str) -> Optional[str]:
+    if method != "POST":
+        return None
+    if path == "/chat":
+        return "chat"
+    if path.startswith("/ingest/") or path == "/chat/batch":
+        return "ingest"
+    return None
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send) -> None:
+        lane_name = lane_for(scope["path"], scope["method"]) if scope["type"] == "http" else None
+        if lane_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.controller.lanes[lane_name]
+        try:
+            await self.controller.acquire(lane)
+        except Rejected as exc:
+            await _reject(send, exc)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(lane, time.monotonic() - started)
+
+
+async def _reject(send, exc: Rejected) -> None:
+    body = json.dumps({"detail": exc.reason}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": exc.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(exc.retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,103 @@
+import argparse
+import json
+import sys
+from itertools import islice
+from typing import Iterable, Iterator
+
+import psycopg
+
+from app.chat import answer_chat
+from app.ingest.embed import embed_texts
+from app.tools import rag_tools, router
+
+DOC_TYPES = ("manual", "preventive")
+MAX_BATCH_SIZE = 1024
+
+
+def _batched(items: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(items)
+    while group := list(islice(iterator, size)):
+        yield group
+
+
+def answer_batch(
+    conn: psycopg.Connection,
+    items: Iterable[dict],
+    batch_size: int = 256,
+    limit: int = 5,
+    embed_batch_size: int = 128,
+) -> Iterator[dict]:
+    index = 0
+    for group in _batched(items, batch_size):
+        intents = [router.route_message(item["message"]) for item in group]
+        lookups = [
+            (i, doc_type)
+            for i, item_intents in enumerate(intents)
+            for doc_type in DOC_TYPES
+            if item_intents[f"rag_{doc_type}"]
+        ]
+
+        # One embedding per distinct message, one SQL round trip for all lookups.
+        messages = list(dict.fromkeys(group[i]["message"] for i, _ in lookups))
+        vectors = dict(zip(messages, embed_texts(messages, batch_size=embed_batch_size)))
+        hits = rag_tools.retrieve_chunks_batch(
+            conn,
+            [
+                (vectors[group[i]["message"]], doc_type, group[i].get("site_id"), group[i].get("equipment_uid"))
+                for i, doc_type in lookups
+            ],
+            limit,
+        )
+        prefetched: list[dict[str, list[dict]]] = [{} for _ in group]
+        for (i, doc_type), evidence in zip(lookups, hits):
+            prefetched[i][doc_type] = evidence
+
+        for item, item_intents, item_evidence in zip(group, intents, prefetched):
+            response = answer_chat(
+                conn,
+                item["message"],
+                item.get("site_id"),
+                item.get("equipment_uid"),
+                item.get("date_range"),
+                intents=item_intents,
+                prefetched=item_evidence,
+            )
+            yield {"index": index, "id": item.get("id"), **response}
+            index += 1
+
+
+def _read_jsonl(stream) -> Iterator[dict]:
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db import get_conn, init_db
+
+    parser = argparse.ArgumentParser(prog="python -m app.batch_qa", description="Answer chat messages in bulk")
+    parser.add_argument("input", help="JSONL file of chat requests, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+    if not 0 < args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {MAX_BATCH_SIZE}")
+
+    init_db()
+    source = sys.stdin if args.input == "-" else open(args.input)
+    sink = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        with get_conn() as conn:
+            for result in answer_batch(conn, _read_jsonl(source), args.batch_size, args.limit):
+                sink.write(json.dumps(result, default=str) + "\n")
+                sink.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
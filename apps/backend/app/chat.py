@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import psycopg
+
+from app.tools import rag_tools, router, sql_tools
+
+
+def _evidence(
+    conn: psycopg.Connection,
+    message: str,
+    doc_type: str,
+    site_id: Optional[str],
+    equipment_uid: Optional[str],
+    prefetched: Optional[dict[str, list[dict]]],
+) -> list[dict]:
+    if prefetched is not None and doc_type in prefetched:
+        return prefetched[doc_type]
+    return rag_tools.retrieve_chunks(conn, message, doc_type, site_id, equipment_uid)
+
+
+def answer_chat(
+    conn: psycopg.Connection,
+    message: str,
+    site_id: Optional[str] = None,
+    equipment_uid: Optional[str] = None,
+    date_range: Optional[dict] = None,
+    intents: Optional[dict] = None,
+    prefetched: Optional[dict[str, list[dict]]] = None,
+) -> dict:
+    if intents is None:
+        intents = router.route_message(message)
+    evidence: list[dict] = []
+    checks: dict[str, Any] = {}
+    answer_parts: list[str] = []
+    suggested_work_order: Optional[dict] = None
+
+    if intents["rag_manual"]:
+        manual_evidence = _evidence(conn, message, "manual", site_id, equipment_uid, prefetched)
+        evidence.extend(manual_evidence)
+        answer_parts.append(rag_tools.generate_answer(message, manual_evidence))
+
+    if intents["rag_preventive"]:
+        preventive_evidence = _evidence(conn, message, "preventive", site_id, equipment_uid, prefetched)
+        evidence.extend(preventive_evidence)
+        answer_parts.append(rag_tools.generate_answer(message, preventive_evidence))
+
+    schedule = None
+    if intents["schedule"] and equipment_uid:
+        schedule = sql_tools.get_next_maintenance(conn, equipment_uid)
+        if schedule:
+            checks["schedule"] = schedule
+            answer_parts.append(
+                f"Next maintenance for {schedule['equipment_uid']} is {schedule['next_date']}"
+            )
+        else:
+            answer_parts.append("No scheduled maintenance found for that equipment.")
+
+    if intents["due"] and site_id:
+        start = date_range["start"] if date_range else datetime.utcnow().date().isoformat()
+        end = date_range["end"] if date_range else (datetime.utcnow().date() + timedelta(days=7)).isoformat()
+        due_list = sql_tools.list_due_maintenance(conn, site_id, start, end)
+        if due_list:
+            summary = ", ".join([f"{row['equipment_uid']} on {row['next_date']}" for row in due_list])
+            answer_parts.append(f"Maintenance due between {start} and {end}: {summary}")
+        else:
+            answer_parts.append("No maintenance due in that window.")
+
+    if intents["employee"] and site_id:
+        required_certs = schedule["required_certs"] if schedule else []
+        employees = sql_tools.find_qualified_employees(conn, site_id, required_certs)
+        start_ts = None
+        end_ts = None
+        if date_range:
+            start_ts = datetime.fromisoformat(date_range["start"])
+            end_ts = datetime.fromisoformat(date_range["end"])
+        elif schedule:
+            start_ts = datetime.fromisoformat(f"{schedule['next_date']}T08:00:00")
+            duration = schedule.get("est_duration_min") or 60
+            end_ts = start_ts + timedelta(minutes=duration)
+
+        employee_payload = []
+        for emp in employees:
+            conflicts = []
+            if start_ts and end_ts:
+                conflicts = sql_tools.check_employee_conflicts(conn, emp["employee_id"], start_ts, end_ts)
+            employee_payload.append(
+                {
+                    "employee_id": emp["employee_id"],
+                    "name": emp["name"],
+                    "conflicts": conflicts,
+                }
+            )
+        checks["employees"] = employee_payload
+        if employee_payload:
+            answer_parts.append("Found qualified employees for the requested criteria.")
+        else:
+            answer_parts.append("No qualified employees found for that criteria.")
+
+    if intents["inventory"] and site_id:
+        part_query = router.extract_part_query(message) or equipment_uid or ""
+        if part_query:
+            inventory = sql_tools.check_inventory(conn, site_id, part_query)
+            checks["inventory"] = inventory
+            if inventory:
+                answer_parts.append("Inventory results are available for the requested part.")
+            else:
+                answer_parts.append("No inventory matches found.")
+
+    if intents["suggest_work_order"] and site_id and equipment_uid:
+        job_type = router.guess_job_type(message)
+        planned_start = date_range["start"] if date_range else None
+        planned_end = date_range["end"] if date_range else None
+        required_certs = schedule["required_certs"] if schedule else []
+        employee_id = None
+        for emp in checks.get("employees", []):
+            if not emp.get("conflicts"):
+                employee_id = emp["employee_id"]
+                break
+        suggested_work_order = {
+            "site_id": site_id,
+            "equipment_uid": equipment_uid,
+            "job_type": job_type,
+            "planned_start": planned_start,
+            "planned_end": planned_end,
+            "required_certs": required_certs,
+            "employee_id": employee_id,
+        }
+        answer_parts.append("Suggested a draft work order based on the request.")
+
+    answer = " ".join([part for part in answer_parts if part])
+    if not answer:
+        answer = "I can help with manuals, schedules, employees, inventory, and work orders."
+
+    response: dict[str, Any] = {"answer": answer}
+    if evidence:
+        response["evidence"] = evidence
+    if checks:
+        response["checks"] = checks
+    if suggested_work_order:
+        response["suggested_work_order"] = suggested_work_order
+    return response
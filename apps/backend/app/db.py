@@ -6,17 +6,21 @@ from psycopg_pool import ConnectionPool
 from pgvector.psycopg import register_vector
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
+MIGRATIONS_DIR = Path(__file__).with_name("migrations")
 
 _pool: ConnectionPool | None = None
+_pool_pid: int | None = None
 
 
 def init_db() -> None:
-    global _pool
-    if _pool is not None:
+    global _pool, _pool_pid
+    # A pool inherited through fork shares sockets with the parent; open a new one.
+    if _pool is not None and _pool_pid == os.getpid():
         return
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL is not set")
     _pool = ConnectionPool(conninfo=DATABASE_URL, min_size=1, max_size=10, open=True)
+    _pool_pid = os.getpid()
     with _pool.connection() as conn:
         register_vector(conn)
     _run_schema_if_needed()
@@ -29,26 +33,53 @@ def get_pool() -> ConnectionPool:
 
 
 def _run_schema_if_needed() -> None:
+    # schema.sql creates the base tables on an empty database; later changes are
+    # numbered files in migrations/ applied once each and recorded in
+    # schema_migrations, so a normal start only runs the two checks below.
     pool = get_pool()
     with pool.connection() as conn:
-        conn.execute("SELECT 1")
-        exists = conn.execute(
+        if _table_exists(conn, "sites") and not _pending_migrations(conn):
+            return
+        # Serialize concurrent worker startups and re-check under the lock.
+        conn.execute("SELECT pg_advisory_xact_lock(hashtext('maint_rag_schema'))")
+        if not _table_exists(conn, "sites"):
+            schema_path = Path(__file__).with_name("schema.sql")
+            conn.execute(schema_path.read_text())
+        conn.execute(
             """
-            SELECT EXISTS (
-                SELECT 1
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                  AND table_name = 'sites'
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
             )
             """
-        ).fetchone()[0]
-        if exists:
-            return
-        schema_path = Path(__file__).with_name("schema.sql")
-        schema_sql = schema_path.read_text()
-        conn.execute(schema_sql)
+        )
+        for path in _pending_migrations(conn):
+            conn.execute(path.read_text())
+            conn.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (path.stem,))
         conn.commit()
 
 
+def _table_exists(conn: psycopg.Connection, table_name: str) -> bool:
+    return conn.execute(
+        """
+        SELECT EXISTS (
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_schema = 'public'
+              AND table_name = %s
+        )
+        """,
+        (table_name,),
+    ).fetchone()[0]
+
+
+def _pending_migrations(conn: psycopg.Connection) -> list[Path]:
+    paths = sorted(MIGRATIONS_DIR.glob("*.sql"))
+    if not _table_exists(conn, "schema_migrations"):
+        return paths
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations").fetchall()}
+    return [path for path in paths if path.stem not in applied]
+
+
 def get_conn() -> psycopg.Connection:
     return get_pool().connection()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import psycopg
+
+from app.db import DATABASE_URL
+
+CHANNEL = "work_order_events"
+QUEUE_SIZE = 256
+
+_subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue, Optional[str]]] = set()
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def start_listener() -> None:
+    global _thread
+    if _thread is not None or not DATABASE_URL:
+        return
+    _thread = threading.Thread(target=_listen, name="work-order-listener", daemon=True)
+    _thread.start()
+
+
+def _listen() -> None:
+    # One LISTEN connection per process, outside the pool, fanned out to all subscribers.
+    while True:
+        try:
+            with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+                conn.execute(f"LISTEN {CHANNEL}")
+                for notify in conn.notifies():
+                    _publish(json.loads(notify.payload))
+        except psycopg.OperationalError:
+            time.sleep(1)
+
+
+def _publish(event: dict) -> None:
+    site_id = event["work_order"].get("site_id")
+    with _lock:
+        targets = [(loop, queue) for loop, queue, site in _subscribers if site is None or site == site_id]
+    for loop, queue in targets:
+        loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue: asyncio.Queue, event: dict) -> None:
+    # Slow clients drop their oldest events rather than blocking the listener.
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+@contextmanager
+def subscribe(site_id: Optional[str] = None) -> Iterator[asyncio.Queue]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    entry = (asyncio.get_running_loop(), queue, site_id)
+    with _lock:
+        _subscribers.add(entry)
+    try:
+        yield queue
+    finally:
+        with _lock:
+            _subscribers.discard(entry)
@@ -11,9 +11,9 @@ def _get_model() -> SentenceTransformer:
     return SentenceTransformer(MODEL_NAME)
 
 
-def embed_texts(texts: List[str]) -> List[list]:
+def embed_texts(texts: List[str], batch_size: int = 32) -> List[list]:
     if not texts:
         return []
     model = _get_model()
-    vectors = model.encode(texts, normalize_embeddings=True)
+    vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
     return [v.tolist() for v in vectors]
@@ -0,0 +1,218 @@
+import argparse
+import json
+import math
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import psycopg
+from pgvector.psycopg import register_vector
+
+EMBEDDING_DIM = 384
+FORMAT_VERSION = 1
+TEXT_COLUMNS = [
+    "doc_id",
+    "doc_type",
+    "site_id",
+    "equipment_uid",
+    "source_name",
+    "section",
+    "content",
+    "content_hash",
+]
+
+# A snapshot is a directory of column files:
+#   manifest.json                 row count, dimension, column list
+#   embedding.npy                 float32 (rows, dim), np.load(..., mmap_mode="r")
+#   <col>.bin / <col>.offsets.npy UTF-8 bytes and int64 row offsets (rows + 1)
+#   <col>.null.npy                bool mask for NULL values
+#   documents.jsonl               document identities and hashes
+
+
+class _TextColumnWriter:
+    def __init__(self, directory: Path, name: str, rows: int) -> None:
+        self.directory = directory
+        self.name = name
+        self.data = open(directory / f"{name}.bin", "wb")
+        self.offsets = np.zeros(rows + 1, dtype=np.int64)
+        self.nulls = np.zeros(rows, dtype=bool)
+        self.position = 0
+
+    def write(self, row: int, value: Optional[str]) -> None:
+        if value is None:
+            self.nulls[row] = True
+        else:
+            encoded = value.encode()
+            self.data.write(encoded)
+            self.position += len(encoded)
+        self.offsets[row + 1] = self.position
+
+    def close(self) -> None:
+        self.data.close()
+        np.save(self.directory / f"{self.name}.offsets.npy", self.offsets)
+        np.save(self.directory / f"{self.name}.null.npy", self.nulls)
+
+
+class TextColumn:
+    def __init__(self, directory: Path, name: str) -> None:
+        self.offsets = np.load(directory / f"{name}.offsets.npy", mmap_mode="r")
+        self.nulls = np.load(directory / f"{name}.null.npy", mmap_mode="r")
+        data_path = directory / f"{name}.bin"
+        # np.memmap cannot map an empty file.
+        if data_path.stat().st_size:
+            self.data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if self.nulls[row]:
+            return None
+        return bytes(self.data[self.offsets[row] : self.offsets[row + 1]]).decode()
+
+
+class Snapshot:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / "manifest.json").read_text())
+        self.rows = self.manifest["rows"]
+        self.embedding = np.load(self.path / "embedding.npy", mmap_mode="r")
+        self.columns = {name: TextColumn(self.path, name) for name in self.manifest["columns"]}
+
+    def documents(self) -> list[dict]:
+        path = self.path / "documents.jsonl"
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def export_snapshot(conn: psycopg.Connection, path: str | Path, batch_size: int = 10_000) -> dict:
+    register_vector(conn)
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # Count and scan in one snapshot so the preallocated arrays match the rows read.
+    conn.rollback()
+    conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+    rows = conn.execute("SELECT COUNT(*) FROM doc_chunks").fetchone()[0]
+    embedding = np.lib.format.open_memmap(
+        directory / "embedding.npy", mode="w+", dtype=np.float32, shape=(rows, EMBEDDING_DIM)
+    )
+    writers = [_TextColumnWriter(directory, name, rows) for name in TEXT_COLUMNS]
+
+    with conn.cursor(name="snapshot_export", binary=True) as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(f"SELECT {', '.join(TEXT_COLUMNS)}, embedding FROM doc_chunks ORDER BY chunk_id")
+        for row_no, row in enumerate(cursor):
+            for writer, value in zip(writers, row):
+                writer.write(row_no, value)
+            embedding[row_no] = row[-1]
+
+    documents = conn.execute(
+        """
+        SELECT json_build_object(
+            'doc_id', doc_id, 'doc_type', doc_type, 'site_id', site_id,
+            'equipment_uid', equipment_uid, 'source_name', source_name,
+            'content_hash', content_hash, 'version', version
+        )::text
+        FROM documents
+        ORDER BY doc_id
+        """
+    ).fetchall()
+    conn.rollback()
+    conn.isolation_level = None
+
+    for writer in writers:
+        writer.close()
+    embedding.flush()
+    del embedding
+    (directory / "documents.jsonl").write_text("".join(f"{doc}\n" for (doc,) in documents))
+    (directory / "manifest.json").write_text(
+        json.dumps(
+            {"format": FORMAT_VERSION, "rows": rows, "dim": EMBEDDING_DIM, "columns": TEXT_COLUMNS},
+            indent=2,
+        )
+    )
+    return {"path": str(directory), "chunks": rows, "documents": len(documents)}
+
+
+def import_snapshot(
+    conn: psycopg.Connection, path: str | Path, lists: Optional[int] = None, truncate: bool = False
+) -> dict:
+    register_vector(conn)
+    snapshot = Snapshot(path)
+    if snapshot.manifest["dim"] != EMBEDDING_DIM:
+        raise ValueError(f"Snapshot dimension {snapshot.manifest['dim']} does not match {EMBEDDING_DIM}")
+    columns = [snapshot.columns[name] for name in TEXT_COLUMNS]
+    cursor = conn.cursor()
+
+    # A snapshot replaces the corpus; loading it next to existing chunks would
+    # duplicate every document that is in both.
+    if truncate:
+        cursor.execute("TRUNCATE doc_chunks, documents")
+    elif cursor.execute("SELECT EXISTS (SELECT 1 FROM doc_chunks)").fetchone()[0]:
+        raise ValueError("doc_chunks is not empty; import with truncate=True (--truncate) to replace it")
+
+    cursor.execute(
+        """
+        INSERT INTO documents (doc_id, doc_type, site_id, equipment_uid, source_name, content_hash, version)
+        SELECT d.doc_id, d.doc_type, d.site_id, d.equipment_uid, d.source_name, d.content_hash, d.version
+        FROM json_populate_recordset(NULL::documents, %s::json) AS d
+        ON CONFLICT DO NOTHING
+        """,
+        (json.dumps(snapshot.documents()),),
+    )
+
+    # Loading into an unindexed table and building ivfflat once is far cheaper
+    # than maintaining the index row by row, and gives it representative lists.
+    cursor.execute("DROP INDEX IF EXISTS idx_doc_chunks_embedding")
+    with cursor.copy(
+        f"COPY doc_chunks ({', '.join(TEXT_COLUMNS)}, embedding) FROM STDIN WITH (FORMAT BINARY)"
+    ) as copy:
+        copy.set_types(["text"] * len(TEXT_COLUMNS) + ["vector"])
+        for row in range(snapshot.rows):
+            copy.write_row([column[row] for column in columns] + [snapshot.embedding[row]])
+
+    total = cursor.execute("SELECT COUNT(*) FROM doc_chunks").fetchone()[0]
+    lists = lists or max(1, int(total / 1000) if total <= 1_000_000 else int(math.sqrt(total)))
+    cursor.execute(
+        f"""
+        CREATE INDEX idx_doc_chunks_embedding
+            ON doc_chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(lists)})
+        """
+    )
+    conn.commit()
+    cursor.execute("ANALYZE doc_chunks")
+    conn.commit()
+    return {"path": str(path), "chunks": snapshot.rows, "lists": lists}
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db import DATABASE_URL
+
+    parser = argparse.ArgumentParser(prog="python -m app.ingest.snapshot", description="Embedding snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Dump doc_chunks to a snapshot directory")
+    export.add_argument("path")
+    restore = sub.add_parser("import", help="Bulk-load a snapshot directory into doc_chunks")
+    restore.add_argument("path")
+    restore.add_argument("--lists", type=int, default=None, help="ivfflat lists for the rebuilt index")
+    restore.add_argument(
+        "--truncate", action="store_true", help="Empty doc_chunks and documents before loading"
+    )
+    args = parser.parse_args(argv)
+
+    if not DATABASE_URL:
+        raise SystemExit("DATABASE_URL is not set")
+    with psycopg.connect(DATABASE_URL) as conn:
+        if args.command == "export":
+            result = export_snapshot(conn, args.path)
+        else:
+            result = import_snapshot(conn, args.path, args.lists, args.truncate)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
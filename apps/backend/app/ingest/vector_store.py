@@ -1,10 +1,17 @@
+import hashlib
 import uuid
 from typing import Optional
 
+from psycopg.rows import dict_row
+
 from app.ingest.chunking import chunk_text
 from app.ingest.embed import embed_texts
 
 
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
 def store_document(
     conn,
     text: str,
@@ -14,24 +21,117 @@ def store_document(
     source_name: str,
     section: Optional[str] = None,
 ) -> dict:
-    chunks = chunk_text(text)
-    vectors = embed_texts(list(chunks))
-    doc_id = str(uuid.uuid4())
+    # An empty query parameter and a missing one name the same document.
+    site_id = site_id or None
+    equipment_uid = equipment_uid or None
+    chunks = list(chunk_text(text))
+    doc_hash = content_hash(text)
+    cursor = conn.cursor(row_factory=dict_row)
+
+    cursor.execute(
+        """
+        INSERT INTO documents (doc_id, doc_type, site_id, equipment_uid, source_name)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (source_name, COALESCE(site_id, ''), COALESCE(equipment_uid, '')) DO NOTHING
+        """,
+        (str(uuid.uuid4()), doc_type, site_id, equipment_uid, source_name),
+    )
+    document = cursor.execute(
+        """
+        SELECT doc_id, doc_type, content_hash, version
+        FROM documents
+        WHERE source_name = %s
+          AND COALESCE(site_id, '') = COALESCE(%s, '')
+          AND COALESCE(equipment_uid, '') = COALESCE(%s, '')
+        FOR UPDATE
+        """,
+        (source_name, site_id, equipment_uid),
+    ).fetchone()
+    doc_id = document["doc_id"]
+
+    if document["version"] > 0 and document["content_hash"] == doc_hash and document["doc_type"] == doc_type:
+        conn.commit()
+        return {
+            "doc_id": doc_id,
+            "version": document["version"],
+            "status": "unchanged",
+            "chunks": len(chunks),
+            "added": 0,
+            "removed": 0,
+        }
+
+    # Match new chunks to existing ones by content hash. Chunks written before
+    # documents existed (or under an older doc_id) share the identity and had
+    # content_hash backfilled by migrations/001, so they are adopted or cleaned
+    # up here too.
+    existing: dict[str, list[int]] = {}
+    for row in cursor.execute(
+        """
+        SELECT chunk_id, content_hash
+        FROM doc_chunks
+        WHERE source_name = %s
+          AND COALESCE(site_id, '') = COALESCE(%s, '')
+          AND COALESCE(equipment_uid, '') = COALESCE(%s, '')
+        ORDER BY chunk_id
+        """,
+        (source_name, site_id, equipment_uid),
+    ).fetchall():
+        existing.setdefault(row["content_hash"], []).append(row["chunk_id"])
 
-    if not chunks:
-        return {"doc_id": doc_id, "chunks": 0}
+    kept: list[int] = []
+    new_chunks: list[tuple[str, str]] = []
+    for content in chunks:
+        chunk_hash = content_hash(content)
+        matches = existing.get(chunk_hash)
+        if matches:
+            kept.append(matches.pop(0))
+        else:
+            new_chunks.append((content, chunk_hash))
+    removed = [chunk_id for ids in existing.values() for chunk_id in ids]
 
-    cursor = conn.cursor()
-    for content, vector in zip(chunks, vectors):
+    vectors = embed_texts([content for content, _ in new_chunks])
+
+    if removed:
+        cursor.execute("DELETE FROM doc_chunks WHERE chunk_id = ANY(%s)", (removed,))
+    if kept:
         cursor.execute(
+            """
+            UPDATE doc_chunks
+            SET doc_id = %s, doc_type = %s
+            WHERE chunk_id = ANY(%s) AND (doc_id <> %s OR doc_type <> %s)
+            """,
+            (doc_id, doc_type, kept, doc_id, doc_type),
+        )
+    if new_chunks:
+        cursor.executemany(
             """
             INSERT INTO doc_chunks (
                 doc_id, doc_type, site_id, equipment_uid,
-                source_name, section, content, embedding
+                source_name, section, content, content_hash, embedding
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             """,
-            (doc_id, doc_type, site_id, equipment_uid, source_name, section, content, vector),
+            [
+                (doc_id, doc_type, site_id, equipment_uid, source_name, section, content, chunk_hash, vector)
+                for (content, chunk_hash), vector in zip(new_chunks, vectors)
+            ],
         )
+    version = cursor.execute(
+        """
+        UPDATE documents
+        SET doc_type = %s, content_hash = %s, version = version + 1, updated_at = NOW()
+        WHERE doc_id = %s
+        RETURNING version
+        """,
+        (doc_type, doc_hash, doc_id),
+    ).fetchone()["version"]
     conn.commit()
-    return {"doc_id": doc_id, "chunks": len(chunks)}
+
+    return {
+        "doc_id": doc_id,
+        "version": version,
+        "status": "updated" if version > 1 else "created",
+        "chunks": len(chunks),
+        "added": len(new_chunks),
+        "removed": len(removed),
+    }
@@ -1,16 +1,23 @@
-from datetime import datetime, timedelta
-from typing import Any, Optional
+import asyncio
+import json
+from datetime import date
+from typing import Optional
 
-from fastapi import FastAPI, File, Header, HTTPException, UploadFile
-from pydantic import BaseModel
+from fastapi import FastAPI, File, Header, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 
+from app import admission, batch_qa, events
+from app.chat import answer_chat
 from app.db import get_conn, init_db
 from app.ingest.loaders import load_text_from_bytes
 from app.ingest.vector_store import store_document
 from app.seed import seed_demo
-from app.tools import rag_tools, router, sql_tools
+from app.tools import planner, sql_tools, vector_index
 
 app = FastAPI(title="Maintenance RAG Backend", version="0.1.0")
+admission_controller = admission.default_controller()
+app.add_middleware(admission.AdmissionMiddleware, controller=admission_controller)
 
 
 class DateRange(BaseModel):
@@ -25,6 +32,15 @@ class ChatRequest(BaseModel):
     date_range: Optional[DateRange] = None
 
 
+class BatchChatItem(ChatRequest):
+    id: Optional[str] = None
+
+
+class BatchChatRequest(BaseModel):
+    items: list[BatchChatItem]
+    batch_size: int = Field(default=256, gt=0, le=batch_qa.MAX_BATCH_SIZE)
+
+
 class SuggestedWorkOrder(BaseModel):
     site_id: str
     equipment_uid: str
@@ -33,6 +49,7 @@ class SuggestedWorkOrder(BaseModel):
     planned_end: Optional[str] = None
     required_certs: Optional[list[str]] = None
     employee_id: Optional[str] = None
+    schedule_id: Optional[int] = None
 
 
 class DraftWorkOrderRequest(SuggestedWorkOrder):
@@ -43,9 +60,39 @@ class ApproveRequest(BaseModel):
     admin_id: str
 
 
+class BulkDraftRequest(BaseModel):
+    orders: list[DraftWorkOrderRequest]
+
+
+class BulkApproveRequest(BaseModel):
+    admin_id: str
+    work_order_ids: list[int]
+
+
+class DispatchPlanRequest(BaseModel):
+    site_id: str
+    start: date
+    end: date
+    workday_start_hour: int = Field(default=8, ge=0, le=23)
+    workday_end_hour: int = Field(default=17, ge=0, le=23)
+    slot_minutes: int = Field(default=30, gt=0)
+    max_slip_days: int = Field(default=0, ge=0)
+    draft: bool = False
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "DispatchPlanRequest":
+        if self.start > self.end:
+            raise ValueError("start must not be after end")
+        if self.workday_start_hour >= self.workday_end_hour:
+            raise ValueError("workday_start_hour must be before workday_end_hour")
+        return self
+
+
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    events.start_listener()
+    vector_index.start_mirror()
 
 
 @app.get("/health")
@@ -53,6 +100,11 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics/admission")
+def admission_metrics() -> dict:
+    return admission_controller.metrics()
+
+
 @app.post("/seed")
 def seed() -> dict:
     with get_conn() as conn:
@@ -61,122 +113,26 @@ def seed() -> dict:
 
 @app.post("/chat")
 def chat(request: ChatRequest) -> dict:
-    intents = router.route_message(request.message)
-    evidence: list[dict] = []
-    checks: dict[str, Any] = {}
-    answer_parts: list[str] = []
-    suggested_work_order: Optional[dict] = None
-
     with get_conn() as conn:
-        if intents["rag_manual"]:
-            manual_evidence = rag_tools.retrieve_chunks(
-                conn, request.message, "manual", request.site_id, request.equipment_uid
-            )
-            evidence.extend(manual_evidence)
-            answer_parts.append(rag_tools.generate_answer(request.message, manual_evidence))
+        return answer_chat(
+            conn,
+            request.message,
+            request.site_id,
+            request.equipment_uid,
+            request.date_range.model_dump() if request.date_range else None,
+        )
 
-        if intents["rag_preventive"]:
-            preventive_evidence = rag_tools.retrieve_chunks(
-                conn, request.message, "preventive", request.site_id, request.equipment_uid
-            )
-            evidence.extend(preventive_evidence)
-            answer_parts.append(rag_tools.generate_answer(request.message, preventive_evidence))
-
-        schedule = None
-        if intents["schedule"] and request.equipment_uid:
-            schedule = sql_tools.get_next_maintenance(conn, request.equipment_uid)
-            if schedule:
-                checks["schedule"] = schedule
-                answer_parts.append(
-                    f"Next maintenance for {schedule['equipment_uid']} is {schedule['next_date']}"
-                )
-            else:
-                answer_parts.append("No scheduled maintenance found for that equipment.")
-
-        if intents["due"] and request.site_id:
-            start = request.date_range.start if request.date_range else datetime.utcnow().date().isoformat()
-            end = request.date_range.end if request.date_range else (datetime.utcnow().date() + timedelta(days=7)).isoformat()
-            due_list = sql_tools.list_due_maintenance(conn, request.site_id, start, end)
-            if due_list:
-                summary = ", ".join([f"{row['equipment_uid']} on {row['next_date']}" for row in due_list])
-                answer_parts.append(f"Maintenance due between {start} and {end}: {summary}")
-            else:
-                answer_parts.append("No maintenance due in that window.")
-
-        if intents["employee"] and request.site_id:
-            required_certs = schedule["required_certs"] if schedule else []
-            employees = sql_tools.find_qualified_employees(conn, request.site_id, required_certs)
-            start_ts = None
-            end_ts = None
-            if request.date_range:
-                start_ts = datetime.fromisoformat(request.date_range.start)
-                end_ts = datetime.fromisoformat(request.date_range.end)
-            elif schedule:
-                start_ts = datetime.fromisoformat(f"{schedule['next_date']}T08:00:00")
-                duration = schedule.get("est_duration_min") or 60
-                end_ts = start_ts + timedelta(minutes=duration)
-
-            employee_payload = []
-            for emp in employees:
-                conflicts = []
-                if start_ts and end_ts:
-                    conflicts = sql_tools.check_employee_conflicts(conn, emp["employee_id"], start_ts, end_ts)
-                employee_payload.append(
-                    {
-                        "employee_id": emp["employee_id"],
-                        "name": emp["name"],
-                        "conflicts": conflicts,
-                    }
-                )
-            checks["employees"] = employee_payload
-            if employee_payload:
-                answer_parts.append("Found qualified employees for the requested criteria.")
-            else:
-                answer_parts.append("No qualified employees found for that criteria.")
-
-        if intents["inventory"] and request.site_id:
-            part_query = router.extract_part_query(request.message) or request.equipment_uid or ""
-            if part_query:
-                inventory = sql_tools.check_inventory(conn, request.site_id, part_query)
-                checks["inventory"] = inventory
-                if inventory:
-                    answer_parts.append("Inventory results are available for the requested part.")
-                else:
-                    answer_parts.append("No inventory matches found.")
-
-        if intents["suggest_work_order"] and request.site_id and request.equipment_uid:
-            job_type = router.guess_job_type(request.message)
-            planned_start = request.date_range.start if request.date_range else None
-            planned_end = request.date_range.end if request.date_range else None
-            required_certs = schedule["required_certs"] if schedule else []
-            employee_id = None
-            for emp in checks.get("employees", []):
-                if not emp.get("conflicts"):
-                    employee_id = emp["employee_id"]
-                    break
-            suggested_work_order = {
-                "site_id": request.site_id,
-                "equipment_uid": request.equipment_uid,
-                "job_type": job_type,
-                "planned_start": planned_start,
-                "planned_end": planned_end,
-                "required_certs": required_certs,
-                "employee_id": employee_id,
-            }
-            answer_parts.append("Suggested a draft work order based on the request.")
-
-    answer = " ".join([part for part in answer_parts if part])
-    if not answer:
-        answer = "I can help with manuals, schedules, employees, inventory, and work orders."
-
-    response: dict[str, Any] = {"answer": answer}
-    if evidence:
-        response["evidence"] = evidence
-    if checks:
-        response["checks"] = checks
-    if suggested_work_order:
-        response["suggested_work_order"] = suggested_work_order
-    return response
+
+@app.post("/chat/batch")
+def chat_batch(request: BatchChatRequest) -> StreamingResponse:
+    items = [item.model_dump() for item in request.items]
+
+    def stream():
+        with get_conn() as conn:
+            for result in batch_qa.answer_batch(conn, items, request.batch_size):
+                yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @app.get("/workorders")
@@ -185,6 +141,26 @@ def list_work_orders(site_id: Optional[str] = None, status: Optional[str] = None
         return sql_tools.get_work_orders(conn, site_id, status)
 
 
+@app.get("/workorders/stream")
+async def stream_work_orders(request: Request, site_id: Optional[str] = None) -> StreamingResponse:
+    async def stream():
+        with events.subscribe(site_id) as queue:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['op'].lower()}\ndata: {json.dumps(event['work_order'])}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/workorders/{work_order_id}")
 def get_work_order(work_order_id: int) -> dict:
     with get_conn() as conn:
@@ -211,6 +187,56 @@ def create_work_order(
         return result
 
 
+@app.post("/workorders/bulk/draft")
+def create_work_orders_bulk(
+    request: BulkDraftRequest,
+    x_user_role: str = Header(default="user"),
+    x_user_id: str = Header(default="unknown"),
+) -> dict:
+    with get_conn() as conn:
+        results = sql_tools.create_work_orders(
+            conn,
+            [order.model_dump() for order in request.orders],
+            require_approval=False,
+            actor_role=x_user_role,
+            actor_id=x_user_id,
+        )
+        return {"results": results}
+
+
+@app.post("/workorders/bulk/approve")
+def approve_work_orders_bulk(
+    request: BulkApproveRequest,
+    x_user_role: str = Header(default="user"),
+) -> dict:
+    if x_user_role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    with get_conn() as conn:
+        return {"results": sql_tools.approve_work_orders(conn, request.work_order_ids, request.admin_id)}
+
+
+@app.post("/workorders/plan")
+def plan_work_orders(
+    request: DispatchPlanRequest,
+    x_user_role: str = Header(default="user"),
+    x_user_id: str = Header(default="unknown"),
+) -> dict:
+    with get_conn() as conn:
+        plan = planner.plan_dispatch(
+            conn,
+            request.site_id,
+            request.start.isoformat(),
+            request.end.isoformat(),
+            workday_start_hour=request.workday_start_hour,
+            workday_end_hour=request.workday_end_hour,
+            slot_minutes=request.slot_minutes,
+            max_slip_days=request.max_slip_days,
+        )
+        if request.draft:
+            plan["assigned"] = planner.draft_plan(conn, plan, x_user_role, x_user_id)
+        return plan
+
+
 @app.post("/workorders/{work_order_id}/approve")
 def approve_work_order(
     work_order_id: int,
@@ -0,0 +1,25 @@
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Chunks written before content hashing share the hash store_document computes,
+-- so re-ingesting their source keeps them instead of re-embedding.
+UPDATE doc_chunks
+SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_doc_chunks_source
+    ON doc_chunks (source_name, site_id, equipment_uid);
+
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    doc_type TEXT NOT NULL,
+    site_id TEXT,
+    equipment_uid TEXT,
+    source_name TEXT NOT NULL,
+    content_hash TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_identity
+    ON documents (source_name, COALESCE(site_id, ''), COALESCE(equipment_uid, ''));
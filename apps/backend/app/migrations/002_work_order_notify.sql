@@ -0,0 +1,16 @@
+CREATE OR REPLACE FUNCTION notify_work_order_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify(
+        'work_order_events',
+        json_build_object('op', TG_OP, 'work_order', row_to_json(NEW))::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER work_orders_notify
+    AFTER INSERT OR UPDATE ON work_orders
+    FOR EACH ROW EXECUTE FUNCTION notify_work_order_change();
@@ -0,0 +1,8 @@
+-- Links a drafted preventive work order to the schedule row it fulfils so the
+-- dispatch planner does not plan the same job twice.
+ALTER TABLE work_orders
+    ADD COLUMN IF NOT EXISTS schedule_id INTEGER REFERENCES maintenance_schedule(schedule_id);
+
+CREATE INDEX IF NOT EXISTS idx_work_orders_schedule
+    ON work_orders (schedule_id)
+    WHERE schedule_id IS NOT NULL;
@@ -0,0 +1,9 @@
+-- One assignment per work order, so concurrent approvals cannot book it twice.
+-- Earlier races may already have left duplicates; keep the first of each.
+DELETE FROM assignments a
+USING assignments b
+WHERE a.work_order_id = b.work_order_id
+  AND a.assignment_id > b.assignment_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_assignments_work_order
+    ON assignments (work_order_id);
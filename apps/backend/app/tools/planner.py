@@ -0,0 +1,210 @@
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+import psycopg
+from psycopg.rows import dict_row
+
+from app.tools import sql_tools
+
+OPEN_STATUSES = ["DRAFT", "PENDING_APPROVAL", "APPROVED", "SCHEDULED", "IN_PROGRESS"]
+
+
+class _Calendar:
+    """Sorted, non-overlapping busy intervals (epoch seconds) for one employee."""
+
+    def __init__(self) -> None:
+        self.starts: list[float] = []
+        self.ends: list[float] = []
+        self.booked = 0.0
+
+    def add(self, start: float, end: float) -> None:
+        self.booked += end - start
+        idx = bisect_right(self.starts, start)
+        if idx and self.ends[idx - 1] >= start:
+            idx -= 1
+            start = self.starts[idx]
+            end = max(end, self.ends[idx])
+            del self.starts[idx], self.ends[idx]
+        while idx < len(self.starts) and self.starts[idx] <= end:
+            end = max(end, self.ends[idx])
+            del self.starts[idx], self.ends[idx]
+        self.starts.insert(idx, start)
+        self.ends.insert(idx, end)
+
+    def earliest_fit(self, lo: float, hi: float, duration: float, step: float) -> Optional[float]:
+        candidate = lo
+        idx = max(0, bisect_right(self.starts, lo) - 1)
+        while candidate + duration <= hi:
+            while idx < len(self.starts) and self.ends[idx] <= candidate:
+                idx += 1
+            if idx == len(self.starts) or self.starts[idx] >= candidate + duration:
+                return candidate
+            # Jump past the blocking interval, keeping starts on the slot grid.
+            blocked_until = self.ends[idx]
+            candidate = lo + step * -(-(blocked_until - lo) // step)
+        return None
+
+
+def _load_jobs(conn: psycopg.Connection, site_id: str, start: date, end: date, max_slip_days: int) -> list[dict]:
+    # Work orders drafted by the planner carry schedule_id. Older or hand-made
+    # ones are matched on equipment and a UTC start anywhere in the slip window.
+    return conn.execute(
+        """
+        SELECT ms.schedule_id, ms.equipment_uid, ms.next_date, ms.required_certs, ms.est_duration_min
+        FROM maintenance_schedule ms
+        WHERE ms.site_id = %s AND ms.next_date BETWEEN %s AND %s
+          AND NOT EXISTS (
+              SELECT 1 FROM work_orders wo
+              WHERE wo.schedule_id = ms.schedule_id
+                AND wo.status = ANY(%s)
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM work_orders wo
+              WHERE wo.schedule_id IS NULL
+                AND wo.site_id = ms.site_id
+                AND wo.equipment_uid = ms.equipment_uid
+                AND wo.planned_start >= ms.next_date::timestamp AT TIME ZONE 'UTC'
+                AND wo.planned_start < (ms.next_date + %s::int + 1)::timestamp AT TIME ZONE 'UTC'
+                AND wo.status = ANY(%s)
+          )
+        ORDER BY ms.next_date, ms.est_duration_min DESC, ms.schedule_id
+        """,
+        (site_id, start, end, OPEN_STATUSES, max_slip_days, OPEN_STATUSES),
+    ).fetchall()
+
+
+def _load_employees(conn: psycopg.Connection, site_id: str) -> list[dict]:
+    return conn.execute(
+        """
+        SELECT e.employee_id, e.name,
+               COALESCE(array_agg(ec.cert) FILTER (WHERE ec.cert IS NOT NULL), '{}') AS certs
+        FROM employees e
+        LEFT JOIN employee_certs ec ON ec.employee_id = e.employee_id
+        WHERE e.site_id = %s
+        GROUP BY e.employee_id, e.name
+        ORDER BY e.employee_id
+        """,
+        (site_id,),
+    ).fetchall()
+
+
+def _load_busy(conn: psycopg.Connection, site_id: str, start: datetime, end: datetime) -> list[dict]:
+    # Approved work orders are booked through assignments; open ones that are
+    # not yet approved (e.g. PENDING_APPROVAL drafts) still hold their window.
+    return conn.execute(
+        """
+        SELECT a.employee_id, a.start_ts, a.end_ts
+        FROM assignments a
+        JOIN employees e ON e.employee_id = a.employee_id
+        WHERE e.site_id = %s AND a.end_ts >= %s AND a.start_ts <= %s
+        UNION ALL
+        SELECT wo.employee_id, wo.planned_start, wo.planned_end
+        FROM work_orders wo
+        JOIN employees e ON e.employee_id = wo.employee_id
+        WHERE e.site_id = %s AND wo.planned_end >= %s AND wo.planned_start <= %s
+          AND wo.status = ANY(%s)
+          AND NOT EXISTS (SELECT 1 FROM assignments a WHERE a.work_order_id = wo.work_order_id)
+        """,
+        (site_id, start, end, site_id, start, end, OPEN_STATUSES),
+    ).fetchall()
+
+
+def plan_dispatch(
+    conn: psycopg.Connection,
+    site_id: str,
+    start_date: str,
+    end_date: str,
+    workday_start_hour: int = 8,
+    workday_end_hour: int = 17,
+    slot_minutes: int = 30,
+    max_slip_days: int = 0,
+) -> dict:
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    # earliest_fit never advances with a non-positive step.
+    if slot_minutes <= 0:
+        raise ValueError("slot_minutes must be positive")
+    if start > end or not 0 <= workday_start_hour < workday_end_hour <= 23 or max_slip_days < 0:
+        raise ValueError("Invalid planning window")
+    conn.row_factory = dict_row
+    horizon_start = datetime.combine(start, time.min, tzinfo=timezone.utc)
+    horizon_end = datetime.combine(end + timedelta(days=max_slip_days + 1), time.min, tzinfo=timezone.utc)
+
+    jobs = _load_jobs(conn, site_id, start, end, max_slip_days)
+    employees = _load_employees(conn, site_id)
+    busy = _load_busy(conn, site_id, horizon_start, horizon_end)
+
+    cert_bits: dict[str, int] = {}
+    for emp in employees:
+        for cert in emp["certs"]:
+            cert_bits.setdefault(cert, 1 << len(cert_bits))
+    employee_masks = [
+        (emp["employee_id"], sum(cert_bits[c] for c in set(emp["certs"]))) for emp in employees
+    ]
+    calendars = {emp["employee_id"]: _Calendar() for emp in employees}
+    for row in busy:
+        calendars[row["employee_id"]].add(row["start_ts"].timestamp(), row["end_ts"].timestamp())
+
+    step = slot_minutes * 60
+    assigned: list[dict] = []
+    unassigned: list[dict] = []
+    for job in jobs:
+        required = job["required_certs"] or []
+        if any(cert not in cert_bits for cert in required):
+            unassigned.append({**job, "reason": "NO_QUALIFIED_EMPLOYEE"})
+            continue
+        mask = sum(cert_bits[c] for c in set(required))
+        qualified = [employee_id for employee_id, emp_mask in employee_masks if emp_mask & mask == mask]
+        if not qualified:
+            unassigned.append({**job, "reason": "NO_QUALIFIED_EMPLOYEE"})
+            continue
+
+        duration = (job["est_duration_min"] or 60) * 60
+        best: Optional[tuple[float, float, str]] = None
+        for offset in range(max_slip_days + 1):
+            day = job["next_date"] + timedelta(days=offset)
+            lo = datetime.combine(day, time(hour=workday_start_hour), tzinfo=timezone.utc).timestamp()
+            hi = datetime.combine(day, time(hour=workday_end_hour), tzinfo=timezone.utc).timestamp()
+            for employee_id in qualified:
+                calendar = calendars[employee_id]
+                slot = calendar.earliest_fit(lo, hi, duration, step)
+                if slot is not None and (best is None or (slot, calendar.booked) < best[:2]):
+                    best = (slot, calendar.booked, employee_id)
+            if best is not None:
+                break
+
+        if best is None:
+            unassigned.append({**job, "reason": "NO_AVAILABLE_SLOT"})
+            continue
+        slot, _, employee_id = best
+        calendars[employee_id].add(slot, slot + duration)
+        assigned.append(
+            {
+                "schedule_id": job["schedule_id"],
+                "site_id": site_id,
+                "equipment_uid": job["equipment_uid"],
+                "job_type": "PREVENTIVE",
+                "planned_start": datetime.fromtimestamp(slot, tz=timezone.utc).isoformat(),
+                "planned_end": datetime.fromtimestamp(slot + duration, tz=timezone.utc).isoformat(),
+                "required_certs": required,
+                "employee_id": employee_id,
+            }
+        )
+
+    return {
+        "site_id": site_id,
+        "start": start_date,
+        "end": end_date,
+        "jobs": len(jobs),
+        "assigned": assigned,
+        "unassigned": unassigned,
+    }
+
+
+def draft_plan(conn: psycopg.Connection, plan: dict, actor_role: str, actor_id: str) -> list[dict]:
+    items = plan["assigned"]
+    results = sql_tools.create_work_orders(conn, items, False, actor_role, actor_id)
+    for item, result in zip(items, results):
+        item.update({k: v for k, v in result.items() if k != "index"})
+    return items
@@ -5,6 +5,7 @@ import psycopg
 from psycopg.rows import dict_row
 
 from app.ingest.embed import embed_texts
+from app.tools import vector_index
 
 USE_OPENAI = os.getenv("USE_OPENAI", "false").lower() == "true"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -24,8 +25,25 @@ def retrieve_chunks(
     equipment_uid: Optional[str],
     limit: int = 5,
 ) -> list[dict]:
-    conn.row_factory = dict_row
     vector = embed_texts([query])[0]
+    rows = search_chunks(conn, vector, doc_type, site_id, equipment_uid, limit)
+    return [_to_evidence(row) for row in rows]
+
+
+def search_chunks(
+    conn: psycopg.Connection,
+    vector: list,
+    doc_type: str,
+    site_id: Optional[str],
+    equipment_uid: Optional[str],
+    limit: int = 5,
+) -> list[dict]:
+    conn.row_factory = dict_row
+    mirror = vector_index.get_mirror()
+    if mirror is not None:
+        hits = [mirror.search(vector, doc_type, site_id, equipment_uid, limit)]
+        return _fetch_hits(conn, hits, [doc_type])[0]
+
     where = ["doc_type = %s"]
     params: list = [doc_type]
     if site_id:
@@ -36,26 +54,105 @@ def retrieve_chunks(
         params.append(equipment_uid)
 
     sql = f"""
-        SELECT source_name, section, content,
+        SELECT chunk_id, source_name, section, content,
                1 - (embedding <=> %s) AS score
         FROM doc_chunks
         WHERE {" AND ".join(where)}
         ORDER BY embedding <=> %s
         LIMIT {limit}
     """
-    rows = conn.execute(sql, [vector] + params + [vector]).fetchall()
+    return conn.execute(sql, [vector] + params + [vector]).fetchall()
 
-    evidence = []
+
+def retrieve_chunks_batch(
+    conn: psycopg.Connection,
+    queries: list[tuple[list, str, Optional[str], Optional[str]]],
+    limit: int = 5,
+) -> list[list[dict]]:
+    if not queries:
+        return []
+    conn.row_factory = dict_row
+    mirror = vector_index.get_mirror()
+    if mirror is not None:
+        hits = [
+            mirror.search(vector, doc_type, site_id, equipment_uid, limit)
+            for vector, doc_type, site_id, equipment_uid in queries
+        ]
+        doc_types = [doc_type for _, doc_type, _, _ in queries]
+        return [[_to_evidence(row) for row in rows] for rows in _fetch_hits(conn, hits, doc_types)]
+
+    rows = conn.execute(
+        """
+        SELECT q.idx, c.source_name, c.section, c.content, c.score
+        FROM (
+            SELECT u.idx, u.doc_type, u.site_id, u.equipment_uid, u.embedding::vector AS embedding
+            FROM unnest(%s::int[], %s::text[], %s::text[], %s::text[], %s::text[])
+                AS u(idx, doc_type, site_id, equipment_uid, embedding)
+        ) q
+        CROSS JOIN LATERAL (
+            SELECT d.source_name, d.section, d.content,
+                   1 - (d.embedding <=> q.embedding) AS score
+            FROM doc_chunks d
+            WHERE d.doc_type = q.doc_type
+              AND (q.site_id IS NULL OR d.site_id = q.site_id)
+              AND (q.equipment_uid IS NULL OR d.equipment_uid = q.equipment_uid)
+            ORDER BY d.embedding <=> q.embedding
+            LIMIT %s
+        ) c
+        ORDER BY q.idx, c.score DESC
+        """,
+        (
+            list(range(len(queries))),
+            [doc_type for _, doc_type, _, _ in queries],
+            [site_id or None for _, _, site_id, _ in queries],
+            [equipment_uid or None for _, _, _, equipment_uid in queries],
+            ["[" + ",".join(str(float(x)) for x in vector) + "]" for vector, _, _, _ in queries],
+            limit,
+        ),
+    ).fetchall()
+
+    results: list[list[dict]] = [[] for _ in queries]
     for row in rows:
-        evidence.append(
-            {
-                "source": row["source_name"],
-                "section": row["section"],
-                "score": float(row["score"]),
-                "snippet": row["content"][:500],
-            }
-        )
-    return evidence
+        results[row["idx"]].append(_to_evidence(row))
+    return results
+
+
+def _fetch_hits(
+    conn: psycopg.Connection, hits: list[list[tuple[int, float]]], doc_types: list[str]
+) -> list[list[dict]]:
+    # The in-process mirror only ranks ids; content is loaded for the winners.
+    # doc_type is re-checked because the mirror can lag a relabel.
+    ids = [chunk_id for ranked in hits for chunk_id, _ in ranked]
+    if not ids:
+        return [[] for _ in hits]
+    content = {
+        row["chunk_id"]: row
+        for row in conn.execute(
+            """
+            SELECT chunk_id, doc_type, source_name, section, content
+            FROM doc_chunks
+            WHERE chunk_id = ANY(%s)
+            """,
+            (ids,),
+        ).fetchall()
+    }
+    return [
+        [
+            {**content[chunk_id], "score": score}
+            for chunk_id, score in ranked
+            if chunk_id in content and content[chunk_id]["doc_type"] == doc_type
+        ]
+        for ranked, doc_type in zip(hits, doc_types)
+    ]
+
+
+def _to_evidence(row: dict) -> dict:
+    return {
+        "source": row["source_name"],
+        "section": row["section"],
+        "score": float(row["score"]),
+        "snippet": row["content"][:500],
+    }
 
 
 def generate_answer(query: str, evidence: list[dict]) -> str:
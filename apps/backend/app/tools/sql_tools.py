@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, Optional
 
 import psycopg
-from psycopg.rows import dict_row
+from psycopg.rows import dict_row, tuple_row
 
 
 def _dict_conn(conn: psycopg.Connection) -> psycopg.Connection:
@@ -116,9 +116,9 @@ def create_work_order(
         """
         INSERT INTO work_orders (
             site_id, equipment_uid, job_type, planned_start, planned_end,
-            required_certs, employee_id, status, created_by, approved_by
+            required_certs, employee_id, schedule_id, status, created_by, approved_by
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING work_order_id, status
         """,
         (
@@ -129,6 +129,7 @@ def create_work_order(
             payload.get("planned_end"),
             payload.get("required_certs", []),
             payload.get("employee_id"),
+            payload.get("schedule_id"),
             status,
             actor_id,
             approved_by,
@@ -149,19 +150,189 @@ def create_work_order(
 
 
 def approve_work_order(conn: psycopg.Connection, work_order_id: int, admin_id: str) -> dict:
-    row = conn.execute(
+    return approve_work_orders(conn, [work_order_id], admin_id)[0]
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _window_error(payload: dict) -> Optional[str]:
+    try:
+        start = _parse_timestamp(payload.get("planned_start"))
+        end = _parse_timestamp(payload.get("planned_end"))
+    except ValueError:
+        return "Invalid planned_start or planned_end"
+    if start is None or end is None:
+        return None
+    if (start.tzinfo is None) != (end.tzinfo is None):
+        return "planned_start and planned_end must both have a UTC offset or neither"
+    if end < start:
+        return "planned_end is before planned_start"
+    return None
+
+
+def create_work_orders(
+    conn: psycopg.Connection,
+    payloads: list[dict],
+    require_approval: bool,
+    actor_role: str,
+    actor_id: str,
+) -> list[dict]:
+    status = "APPROVED" if actor_role == "admin" and not require_approval else "PENDING_APPROVAL"
+    approved_by = actor_id if status == "APPROVED" else None
+    if not payloads:
+        return []
+    cursor = conn.cursor(row_factory=tuple_row)
+
+    # Validate references set-wise so one bad row does not abort the batch.
+    equipment_sites = dict(
+        cursor.execute(
+            "SELECT equipment_uid, site_id FROM equipment WHERE equipment_uid = ANY(%s)",
+            (list({p["equipment_uid"] for p in payloads}),),
+        ).fetchall()
+    )
+    known_employees = {
+        row[0]
+        for row in cursor.execute(
+            "SELECT employee_id FROM employees WHERE employee_id = ANY(%s)",
+            (list({p["employee_id"] for p in payloads if p.get("employee_id")}),),
+        ).fetchall()
+    }
+    schedule_targets = {
+        row[0]: (row[1], row[2])
+        for row in cursor.execute(
+            "SELECT schedule_id, site_id, equipment_uid FROM maintenance_schedule WHERE schedule_id = ANY(%s)",
+            (list({p["schedule_id"] for p in payloads if p.get("schedule_id") is not None}),),
+        ).fetchall()
+    }
+
+    results: list[dict] = []
+    valid: list[tuple[int, dict]] = []
+    for index, payload in enumerate(payloads):
+        detail = None
+        if equipment_sites.get(payload["equipment_uid"]) != payload["site_id"]:
+            detail = "Unknown equipment_uid for site_id"
+        elif payload.get("employee_id") and payload["employee_id"] not in known_employees:
+            detail = "Unknown employee_id"
+        elif payload.get("schedule_id") is not None and schedule_targets.get(payload["schedule_id"]) != (
+            payload["site_id"],
+            payload["equipment_uid"],
+        ):
+            detail = "Unknown schedule_id for site_id and equipment_uid"
+        else:
+            detail = _window_error(payload)
+        if detail:
+            results.append({"index": index, "status": "INVALID", "detail": detail})
+        else:
+            results.append({"index": index})
+            valid.append((index, payload))
+
+    if valid:
+        cursor.executemany(
+            """
+            INSERT INTO work_orders (
+                site_id, equipment_uid, job_type, planned_start, planned_end,
+                required_certs, employee_id, schedule_id, status, created_by, approved_by
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING work_order_id, status
+            """,
+            [
+                (
+                    payload["site_id"],
+                    payload["equipment_uid"],
+                    payload["job_type"],
+                    payload.get("planned_start"),
+                    payload.get("planned_end"),
+                    payload.get("required_certs") or [],
+                    payload.get("employee_id"),
+                    payload.get("schedule_id"),
+                    status,
+                    actor_id,
+                    approved_by,
+                )
+                for _, payload in valid
+            ],
+            returning=True,
+        )
+        for index, _ in valid:
+            work_order_id, row_status = cursor.fetchone()
+            results[index].update({"work_order_id": work_order_id, "status": row_status})
+            cursor.nextset()
+
+        if status == "APPROVED":
+            cursor.executemany(
+                """
+                INSERT INTO assignments (work_order_id, employee_id, start_ts, end_ts)
+                VALUES (%s, %s, %s, %s)
+                """,
+                [
+                    (results[index]["work_order_id"], p["employee_id"], p["planned_start"], p["planned_end"])
+                    for index, p in valid
+                    if p.get("employee_id") and p.get("planned_start") and p.get("planned_end")
+                ],
+            )
+
+    conn.commit()
+    return results
+
+
+def approve_work_orders(conn: psycopg.Connection, work_order_ids: list[int], admin_id: str) -> list[dict]:
+    cursor = conn.cursor(row_factory=tuple_row)
+    rows = cursor.execute(
         """
-        UPDATE work_orders
-        SET status = 'APPROVED', approved_by = %s, updated_at = NOW()
-        WHERE work_order_id = %s
-        RETURNING work_order_id, status
+        WITH approved AS (
+            UPDATE work_orders
+            SET status = 'APPROVED', approved_by = %s, updated_at = NOW()
+            WHERE work_order_id = ANY(%s)
+              AND status IN ('DRAFT', 'PENDING_APPROVAL')
+            RETURNING work_order_id, status, employee_id, planned_start, planned_end
+        ),
+        assigned AS (
+            INSERT INTO assignments (work_order_id, employee_id, start_ts, end_ts)
+            SELECT ap.work_order_id, ap.employee_id, ap.planned_start, ap.planned_end
+            FROM approved ap
+            WHERE ap.employee_id IS NOT NULL
+              AND ap.planned_start IS NOT NULL
+              AND ap.planned_end IS NOT NULL
+            ON CONFLICT (work_order_id) DO NOTHING
+            RETURNING work_order_id
+        )
+        SELECT ap.work_order_id, ap.status, asg.work_order_id IS NOT NULL
+        FROM approved ap
+        LEFT JOIN assigned asg ON asg.work_order_id = ap.work_order_id
         """,
-        (admin_id, work_order_id),
-    ).fetchone()
+        (admin_id, list(work_order_ids)),
+    ).fetchall()
+    found = {row[0]: row for row in rows}
+    # Orders that exist but were not approvable (already approved, done, rejected).
+    current = dict(
+        cursor.execute(
+            "SELECT work_order_id, status FROM work_orders WHERE work_order_id = ANY(%s)",
+            ([work_order_id for work_order_id in work_order_ids if work_order_id not in found],),
+        ).fetchall()
+    )
     conn.commit()
-    if not row:
-        return {"work_order_id": work_order_id, "status": "NOT_FOUND"}
-    return {"work_order_id": row[0], "status": row[1]}
+
+    results = []
+    for work_order_id in work_order_ids:
+        row = found.get(work_order_id)
+        if row:
+            results.append({"work_order_id": row[0], "status": row[1], "assignment_created": row[2]})
+        elif work_order_id in current:
+            results.append(
+                {
+                    "work_order_id": work_order_id,
+                    "status": "INVALID_STATE",
+                    "detail": f"Work order is {current[work_order_id]}",
+                }
+            )
+        else:
+            results.append({"work_order_id": work_order_id, "status": "NOT_FOUND"})
+    return results
 
 
 def get_work_orders(conn: psycopg.Connection, site_id: Optional[str], status: Optional[str]) -> list[dict]:
@@ -0,0 +1,301 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import IO, Optional
+
+import numpy as np
+import psycopg
+from pgvector.psycopg import register_vector
+
+from app.db import DATABASE_URL
+
+EMBEDDING_DIM = 384
+VECTOR_MIRROR = os.getenv("VECTOR_MIRROR", "false").lower() == "true"
+VECTOR_MIRROR_DIR = os.getenv("VECTOR_MIRROR_DIR", "")
+REFRESH_INTERVAL_S = float(os.getenv("VECTOR_MIRROR_REFRESH_S", "2"))
+MAX_STALENESS_S = float(os.getenv("VECTOR_MIRROR_MAX_STALENESS_S", "10"))
+RECONCILE_INTERVAL_S = float(os.getenv("VECTOR_MIRROR_RECONCILE_S", "60"))
+OVERLAP_IDS = int(os.getenv("VECTOR_MIRROR_OVERLAP_IDS", "10000"))
+
+logger = logging.getLogger(__name__)
+_mirror: Optional["VectorMirror"] = None
+_mirror_pid: Optional[int] = None
+
+
+class _Codes:
+    # Dictionary-encodes metadata strings to small ints; NULL is -1.
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        return self.codes.setdefault(value, len(self.codes))
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self.codes.get(value)
+
+
+class VectorMirror:
+    def __init__(self, directory: str = "") -> None:
+        self.directory = Path(directory) if directory else None
+        self.size = 0
+        self.capacity = 0
+        self.matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.chunk_ids = np.zeros(0, dtype=np.int64)
+        self.doc_types = np.zeros(0, dtype=np.int16)
+        self.sites = np.zeros(0, dtype=np.int32)
+        self.equipment = np.zeros(0, dtype=np.int32)
+        self.live = np.zeros(0, dtype=bool)
+        self.doc_type_codes = _Codes()
+        self.site_codes = _Codes()
+        self.equipment_codes = _Codes()
+        self.max_chunk_id = 0
+        self.change_counters: Optional[tuple] = None
+        self.refreshed_at = 0.0
+        self.reconciled_at = 0.0
+        self._backing = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return self.refreshed_at > 0 and time.monotonic() - self.refreshed_at <= MAX_STALENESS_S
+
+    def _allocate_matrix(self, capacity: int) -> tuple[np.ndarray, Optional[IO[bytes]]]:
+        if self.directory is None:
+            return np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32), None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # An unlinked file: the space is released once the mapping is dropped,
+        # including when the process exits or is killed.
+        backing = tempfile.TemporaryFile(dir=self.directory)
+        return np.memmap(backing, dtype=np.float32, mode="w+", shape=(capacity, EMBEDDING_DIM)), backing
+
+    def after_fork(self) -> None:
+        # The matrix was loaded in the gunicorn master. Anonymous memory is
+        # already copy-on-write across fork, but a file mapping is shared, so
+        # appends from one worker would overwrite rows in the others. Re-map
+        # the same file privately: pages stay shared through the page cache
+        # until this worker writes to them.
+        if self._backing is not None:
+            self.matrix = np.memmap(
+                self._backing, dtype=np.float32, mode="c", shape=(self.capacity, EMBEDDING_DIM)
+            )
+            self._backing.close()
+            self._backing = None
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        matrix, backing = self._allocate_matrix(capacity)
+        matrix[: self.size] = self.matrix[: self.size]
+        arrays = {}
+        for name in ("chunk_ids", "doc_types", "sites", "equipment", "live"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            arrays[name] = new
+        # Swap under the lock so readers never see arrays of different capacity.
+        with self._lock:
+            self.matrix = matrix
+            for name, array in arrays.items():
+                setattr(self, name, array)
+            self.capacity = capacity
+        if self._backing is not None:
+            self._backing.close()
+        self._backing = backing
+
+    def _append(self, rows: list[tuple]) -> None:
+        start = self.size
+        end = start + len(rows)
+        self._grow(end)
+        vectors = np.asarray([row[4] for row in rows], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix[start:end] = vectors / np.where(norms == 0, 1, norms)
+        self.chunk_ids[start:end] = [row[0] for row in rows]
+        self.doc_types[start:end] = [self.doc_type_codes.encode(row[1]) for row in rows]
+        self.sites[start:end] = [self.site_codes.encode(row[2]) for row in rows]
+        self.equipment[start:end] = [self.equipment_codes.encode(row[3]) for row in rows]
+        self.live[start:end] = True
+        # Publish the new rows only after they are fully written.
+        with self._lock:
+            self.size = end
+        self.max_chunk_id = max(self.max_chunk_id, max(int(row[0]) for row in rows))
+
+    def _load(self, conn: psycopg.Connection, where: str, params: tuple, batch_size: int) -> int:
+        added = 0
+        with conn.cursor(name="vector_mirror_refresh", binary=True) as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(
+                f"""
+                SELECT chunk_id, doc_type, site_id, equipment_uid, embedding
+                FROM doc_chunks
+                WHERE {where}
+                ORDER BY chunk_id
+                """,
+                params,
+            )
+            while rows := cursor.fetchmany(batch_size):
+                self._append(rows)
+                added += len(rows)
+        return added
+
+    def refresh(self, conn: psycopg.Connection, batch_size: int = 10_000) -> int:
+        floor = max(0, self.max_chunk_id - OVERLAP_IDS)
+        added = self._load(conn, "chunk_id > %s", (self.max_chunk_id,), batch_size)
+        added += self._load_late_commits(conn, floor, batch_size)
+        # Deletes and doc_type relabels from re-ingestion move the table's
+        # cumulative stats counters, which are far cheaper to poll than a count.
+        counters = conn.execute(
+            """
+            SELECT n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+            WHERE relid = 'doc_chunks'::regclass
+            """
+        ).fetchone()
+        if counters != self.change_counters or time.monotonic() - self.reconciled_at >= RECONCILE_INTERVAL_S:
+            added += self._reconcile(conn, batch_size)
+        self.change_counters = counters
+        conn.rollback()
+        self.refreshed_at = time.monotonic()
+        return added
+
+    def _load_late_commits(self, conn: psycopg.Connection, floor: int, batch_size: int) -> int:
+        # chunk_id is taken at insert but visible only at commit, so the
+        # chunk_id > max_chunk_id scan can pass over an id whose transaction
+        # commits later. Such ids sit just below the old watermark; re-read
+        # the ids of that window (an index-only scan) and load any not seen.
+        recent = np.asarray(
+            conn.execute(
+                "SELECT chunk_id FROM doc_chunks WHERE chunk_id > %s AND chunk_id <= %s",
+                (floor, self.max_chunk_id),
+            ).fetchall(),
+            dtype=np.int64,
+        ).reshape(-1)
+        known = self.chunk_ids[: self.size]
+        missing = np.setdiff1d(recent, known[known > floor])
+        if not len(missing):
+            return 0
+        return self._load(conn, "chunk_id = ANY(%s)", (missing.tolist(),), batch_size)
+
+    def _reconcile(self, conn: psycopg.Connection, batch_size: int) -> int:
+        # Full comparison of (chunk_id, doc_type) sets: drops deleted chunks,
+        # applies relabels and loads ids that committed later than the
+        # overlap window covers.
+        known = self.chunk_ids[: self.size]
+        alive = np.zeros(self.size, dtype=bool)
+        seen = [np.zeros(0, dtype=np.int64)]
+        for doc_type, ids in conn.execute(
+            """
+            SELECT doc_type, array_agg(chunk_id)
+            FROM doc_chunks
+            WHERE chunk_id <= %s
+            GROUP BY doc_type
+            """,
+            (self.max_chunk_id,),
+        ).fetchall():
+            ids = np.asarray(ids, dtype=np.int64)
+            present = np.isin(known, ids)
+            self.doc_types[: self.size][present] = self.doc_type_codes.encode(doc_type)
+            alive |= present
+            seen.append(ids)
+        self.live[: self.size] &= alive
+        missing = np.setdiff1d(np.concatenate(seen), known)
+        added = 0
+        if len(missing):
+            added = self._load(conn, "chunk_id = ANY(%s)", (missing.tolist(),), batch_size)
+        self.reconciled_at = time.monotonic()
+        return added
+
+    def search(
+        self,
+        vector,
+        doc_type: str,
+        site_id: Optional[str],
+        equipment_uid: Optional[str],
+        limit: int,
+    ) -> list[tuple[int, float]]:
+        with self._lock:
+            size = self.size
+            matrix, chunk_ids = self.matrix, self.chunk_ids
+            live, doc_types, sites, equipment = self.live, self.doc_types, self.sites, self.equipment
+
+        code = self.doc_type_codes.lookup(doc_type)
+        if code is None:
+            return []
+        mask = live[:size] & (doc_types[:size] == code)
+        if site_id:
+            code = self.site_codes.lookup(site_id)
+            if code is None:
+                return []
+            mask &= sites[:size] == code
+        if equipment_uid:
+            code = self.equipment_codes.lookup(equipment_uid)
+            if code is None:
+                return []
+            mask &= equipment[:size] == code
+
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = matrix[rows] @ query
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(chunk_ids[rows[i]]), float(scores[i])) for i in top]
+
+
+def _refresh_loop(mirror: VectorMirror) -> None:
+    conn: Optional[psycopg.Connection] = None
+    while True:
+        try:
+            if conn is None or conn.closed:
+                conn = psycopg.connect(DATABASE_URL)
+                register_vector(conn)
+            mirror.refresh(conn)
+        except Exception:
+            # The mirror goes stale and retrieval falls back to SQL until the next success.
+            logger.exception("vector mirror refresh failed")
+            if conn is not None:
+                conn.close()
+            conn = None
+        time.sleep(REFRESH_INTERVAL_S)
+
+
+def preload_mirror() -> None:
+    # Called from the gunicorn master (gunicorn.conf.py) so the matrix is
+    # loaded once and every worker inherits it copy-on-write.
+    global _mirror
+    if not VECTOR_MIRROR or _mirror is not None or not DATABASE_URL:
+        return
+    mirror = VectorMirror(VECTOR_MIRROR_DIR)
+    with psycopg.connect(DATABASE_URL) as conn:
+        register_vector(conn)
+        rows = conn.execute("SELECT COUNT(*) FROM doc_chunks").fetchone()[0]
+        # Headroom so workers append into the inherited matrix instead of
+        # each growing into a private copy of it.
+        mirror._grow(int(rows * 1.25) + 1024)
+        mirror.refresh(conn)
+    _mirror = mirror
+
+
+def start_mirror() -> None:
+    global _mirror, _mirror_pid
+    if not VECTOR_MIRROR or not DATABASE_URL or _mirror_pid == os.getpid():
+        return
+    if _mirror is None:
+        _mirror = VectorMirror(VECTOR_MIRROR_DIR)
+    else:
+        _mirror.after_fork()
+    _mirror_pid = os.getpid()
+    threading.Thread(target=_refresh_loop, args=(_mirror,), name="vector-mirror", daemon=True).start()
+
+
+def get_mirror() -> Optional[VectorMirror]:
+    if _mirror is not None and _mirror.is_fresh():
+        return _mirror
+    return None
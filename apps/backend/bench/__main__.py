@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import sys
+
+import psycopg
+from pgvector.psycopg import register_vector
+
+from bench import recall, synthetic, workloads
+
+
+def _connect(database_url: str) -> psycopg.Connection:
+    if not database_url:
+        raise SystemExit("DATABASE_URL is not set")
+    conn = psycopg.connect(database_url)
+    register_vector(conn)
+    return conn
+
+
+def _scale(args: argparse.Namespace) -> synthetic.Scale:
+    return synthetic.Scale(
+        sites=args.sites,
+        equipment_per_site=args.equipment_per_site,
+        employees=args.employees,
+        assignments=args.assignments,
+        chunks=args.chunks,
+        horizon_days=args.horizon_days,
+        seed=args.seed,
+    )
+
+
+def _emit(result: dict) -> None:
+    sys.stdout.write(json.dumps(result, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = synthetic.Scale()
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Load and recall benchmarks")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", ""))
+    parser.add_argument("--sites", type=int, default=defaults.sites)
+    parser.add_argument("--equipment-per-site", type=int, default=defaults.equipment_per_site)
+    parser.add_argument("--employees", type=int, default=defaults.employees)
+    parser.add_argument("--assignments", type=int, default=defaults.assignments)
+    parser.add_argument("--chunks", type=int, default=defaults.chunks)
+    parser.add_argument("--horizon-days", type=int, default=defaults.horizon_days)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("generate", help="Bulk-load synthetic sites, staff, schedules and chunks")
+    sub.add_parser("clear", help="Delete all synthetic benchmark rows")
+
+    load = sub.add_parser("load", help="Run HTTP workloads against a running backend")
+    load.add_argument("--base-url", default="http://localhost:8000")
+    load.add_argument("--workload", choices=sorted(workloads.WORKLOADS), action="append")
+    load.add_argument("--requests", type=int, default=200)
+    load.add_argument("--concurrency", type=int, default=8)
+
+    rec = sub.add_parser("recall", help="Compare retrieve_chunks ANN results against exact search")
+    rec.add_argument("--queries", type=int, default=100)
+    rec.add_argument("-k", type=int, default=5)
+    rec.add_argument("--probes", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    scale = _scale(args)
+
+    if args.command == "generate":
+        with _connect(args.database_url) as conn:
+            _emit({"generated": synthetic.generate(conn, scale)})
+    elif args.command == "clear":
+        with _connect(args.database_url) as conn:
+            _emit({"deleted": synthetic.clear(conn)})
+    elif args.command == "load":
+        client = workloads.Client(args.base_url)
+        for name in args.workload or sorted(workloads.WORKLOADS):
+            send = workloads.WORKLOADS[name](client, scale)
+            _emit(workloads.run_workload(name, send, args.requests, args.concurrency))
+    elif args.command == "recall":
+        with _connect(args.database_url) as conn:
+            _emit(recall.measure_recall(conn, args.queries, args.k, args.probes, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
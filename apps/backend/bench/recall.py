@@ -0,0 +1,98 @@
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+import psycopg
+from psycopg.rows import tuple_row
+
+from app.tools.rag_tools import search_chunks
+from bench.workloads import percentile
+
+
+def exact_search(
+    conn: psycopg.Connection,
+    vector,
+    doc_type: str,
+    site_id: Optional[str],
+    equipment_uid: Optional[str],
+    limit: int,
+) -> list[dict]:
+    conn.execute("SET LOCAL enable_indexscan = off")
+    conn.execute("SET LOCAL enable_bitmapscan = off")
+    try:
+        return search_chunks(conn, vector, doc_type, site_id, equipment_uid, limit)
+    finally:
+        conn.rollback()
+
+
+def sample_queries(conn: psycopg.Connection, queries: int, seed: int, noise: float) -> list[tuple]:
+    rng = np.random.default_rng(seed)
+    cursor = conn.cursor(row_factory=tuple_row)
+    bounds = cursor.execute("SELECT MIN(chunk_id), MAX(chunk_id) FROM doc_chunks").fetchone()
+    if bounds is None or bounds[0] is None:
+        return []
+    ids = rng.integers(bounds[0], bounds[1] + 1, size=queries * 2).tolist()
+    rows = cursor.execute(
+        """
+        SELECT embedding, doc_type, site_id, equipment_uid
+        FROM doc_chunks
+        WHERE chunk_id = ANY(%s)
+        LIMIT %s
+        """,
+        (ids, queries),
+    ).fetchall()
+    conn.rollback()
+
+    samples = []
+    for embedding, doc_type, site_id, equipment_uid in rows:
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector + noise * rng.standard_normal(vector.shape).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        # Alternate between site-level and equipment-level filters, as /chat does.
+        samples.append((vector, doc_type, site_id, equipment_uid if len(samples) % 2 else None))
+    return samples
+
+
+def measure_recall(
+    conn: psycopg.Connection,
+    queries: int = 100,
+    k: int = 5,
+    probes: Optional[int] = None,
+    noise: float = 0.05,
+    seed: int = 0,
+) -> dict:
+    if probes is not None:
+        conn.execute(f"SET ivfflat.probes = {int(probes)}")
+        conn.commit()
+    samples = sample_queries(conn, queries, seed, noise)
+
+    recalls: list[float] = []
+    ann_latencies: list[float] = []
+    exact_latencies: list[float] = []
+    for vector, doc_type, site_id, equipment_uid in samples:
+        started = perf_counter()
+        ann = search_chunks(conn, vector, doc_type, site_id, equipment_uid, k)
+        ann_latencies.append(perf_counter() - started)
+        conn.rollback()
+
+        started = perf_counter()
+        exact = exact_search(conn, vector, doc_type, site_id, equipment_uid, k)
+        exact_latencies.append(perf_counter() - started)
+
+        truth = {row["chunk_id"] for row in exact}
+        if truth:
+            recalls.append(len(truth & {row["chunk_id"] for row in ann}) / len(truth))
+
+    ann_latencies.sort()
+    exact_latencies.sort()
+    return {
+        "queries": len(samples),
+        "k": k,
+        "probes": probes,
+        f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+        "min_recall": round(min(recalls), 4) if recalls else None,
+        "ann_p50_ms": round(percentile(ann_latencies, 50) * 1000, 2),
+        "ann_p95_ms": round(percentile(ann_latencies, 95) * 1000, 2),
+        "exact_p50_ms": round(percentile(exact_latencies, 50) * 1000, 2),
+        "exact_p95_ms": round(percentile(exact_latencies, 95) * 1000, 2),
+    }
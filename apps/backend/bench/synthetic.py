@@ -0,0 +1,258 @@
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import psycopg
+
+PREFIX = "BENCH"
+DOC_PREFIX = "bench-"
+CREATED_BY = "bench"
+EMBEDDING_DIM = 384
+
+CERTS = [
+    "HYDRAULICS",
+    "LOCKOUT",
+    "ELECTRICAL",
+    "HIGH_VOLTAGE",
+    "HVAC_L1",
+    "HVAC_L2",
+    "PNEUMATICS",
+    "WELDING",
+    "RIGGING",
+    "CONFINED_SPACE",
+    "BOILER",
+    "FORKLIFT",
+]
+
+WORDS = [
+    "pump", "valve", "seal", "bearing", "motor", "belt", "filter", "hose",
+    "pressure", "torque", "lubricate", "inspect", "replace", "calibrate",
+    "vibration", "temperature", "coupling", "gearbox", "sensor", "relay",
+    "breaker", "fuse", "compressor", "fan", "coil", "damper", "actuator",
+    "gasket", "alignment", "leak", "fault", "alarm", "reset", "isolate",
+]
+
+
+@dataclass
+class Scale:
+    sites: int = 50
+    equipment_per_site: int = 40
+    employees: int = 10_000
+    certs_per_employee: int = 3
+    schedules_per_equipment: int = 4
+    parts_per_site: int = 200
+    assignments: int = 20_000
+    chunks: int = 100_000
+    topics: int = 256
+    horizon_days: int = 30
+    seed: int = 0
+
+
+def site_ids(scale: Scale) -> list[str]:
+    return [f"{PREFIX}-S{s:03d}" for s in range(scale.sites)]
+
+
+def equipment_uids(scale: Scale) -> list[tuple[str, str]]:
+    return [
+        (site_id, f"{site_id}-EQ{e:04d}")
+        for site_id in site_ids(scale)
+        for e in range(scale.equipment_per_site)
+    ]
+
+
+def employee_ids(scale: Scale) -> list[tuple[str, str]]:
+    sites = site_ids(scale)
+    return [(f"{PREFIX}-E{i:06d}", sites[i % len(sites)]) for i in range(scale.employees)]
+
+
+def topic_centroids(scale: Scale) -> np.ndarray:
+    rng = np.random.default_rng(scale.seed)
+    centroids = rng.standard_normal((scale.topics, EMBEDDING_DIM)).astype(np.float32)
+    return centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+
+def synthetic_embeddings(
+    centroids: np.ndarray, topics: np.ndarray, rng: np.random.Generator, noise: float = 0.35
+) -> np.ndarray:
+    vectors = centroids[topics] + noise * rng.standard_normal((len(topics), EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_text(rng: random.Random, words: int = 180) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate(conn: psycopg.Connection, scale: Scale, batch_size: int = 10_000) -> dict:
+    rng = random.Random(scale.seed)
+    counts: dict[str, int] = {}
+    cursor = conn.cursor()
+
+    sites = site_ids(scale)
+    with cursor.copy("COPY sites (site_id, name) FROM STDIN") as copy:
+        for site_id in sites:
+            copy.write_row((site_id, f"Bench Site {site_id[-3:]}"))
+    counts["sites"] = len(sites)
+
+    equipment = equipment_uids(scale)
+    with cursor.copy("COPY equipment (equipment_uid, site_id, name) FROM STDIN") as copy:
+        for site_id, equipment_uid in equipment:
+            copy.write_row((equipment_uid, site_id, f"{rng.choice(WORDS).title()} Unit"))
+    counts["equipment"] = len(equipment)
+
+    employees = employee_ids(scale)
+    with cursor.copy("COPY employees (employee_id, site_id, name) FROM STDIN") as copy:
+        for employee_id, site_id in employees:
+            copy.write_row((employee_id, site_id, f"Technician {employee_id[-6:]}"))
+    counts["employees"] = len(employees)
+
+    cert_rows = 0
+    with cursor.copy("COPY employee_certs (employee_id, cert) FROM STDIN") as copy:
+        for employee_id, _ in employees:
+            for cert in rng.sample(CERTS, scale.certs_per_employee):
+                copy.write_row((employee_id, cert))
+                cert_rows += 1
+    counts["employee_certs"] = cert_rows
+
+    today = date.today()
+    schedule_rows = 0
+    with cursor.copy(
+        """
+        COPY maintenance_schedule (site_id, equipment_uid, next_date, required_certs, est_duration_min)
+        FROM STDIN
+        """
+    ) as copy:
+        for site_id, equipment_uid in equipment:
+            for _ in range(scale.schedules_per_equipment):
+                copy.write_row(
+                    (
+                        site_id,
+                        equipment_uid,
+                        today + timedelta(days=rng.randrange(scale.horizon_days)),
+                        rng.sample(CERTS, rng.randint(1, 2)),
+                        rng.choice([30, 60, 90, 120, 180, 240]),
+                    )
+                )
+                schedule_rows += 1
+    counts["maintenance_schedule"] = schedule_rows
+
+    with cursor.copy("COPY inventory (site_id, part_id, part_name, qty, reorder_level) FROM STDIN") as copy:
+        for site_id in sites:
+            for p in range(scale.parts_per_site):
+                copy.write_row((site_id, f"PART-{p:05d}", f"{rng.choice(WORDS).title()} Part {p}", rng.randint(0, 50), 5))
+    counts["inventory"] = len(sites) * scale.parts_per_site
+
+    with cursor.copy(
+        """
+        COPY work_orders (
+            site_id, equipment_uid, job_type, planned_start, planned_end,
+            employee_id, status, created_by, approved_by
+        )
+        FROM STDIN
+        """
+    ) as copy:
+        for _ in range(scale.assignments):
+            employee_id, site_id = rng.choice(employees)
+            equipment_uid = f"{site_id}-EQ{rng.randrange(scale.equipment_per_site):04d}"
+            day = today + timedelta(days=rng.randrange(scale.horizon_days))
+            start = datetime.combine(day, time(hour=rng.randint(6, 16)))
+            end = start + timedelta(minutes=rng.choice([60, 90, 120, 180]))
+            copy.write_row(
+                (site_id, equipment_uid, "PREVENTIVE", start, end, employee_id, "APPROVED", CREATED_BY, CREATED_BY)
+            )
+    cursor.execute(
+        """
+        INSERT INTO assignments (work_order_id, employee_id, start_ts, end_ts)
+        SELECT work_order_id, employee_id, planned_start, planned_end
+        FROM work_orders
+        WHERE created_by = %s AND site_id LIKE %s
+        """,
+        (CREATED_BY, f"{PREFIX}-%"),
+    )
+    counts["assignments"] = cursor.rowcount
+    conn.commit()
+
+    counts["doc_chunks"] = generate_chunks(conn, scale, batch_size)
+    cursor.execute("REINDEX INDEX idx_doc_chunks_embedding")
+    cursor.execute("ANALYZE")
+    conn.commit()
+    return counts
+
+
+def generate_chunks(conn: psycopg.Connection, scale: Scale, batch_size: int = 10_000) -> int:
+    rng = random.Random(scale.seed + 1)
+    np_rng = np.random.default_rng(scale.seed + 1)
+    centroids = topic_centroids(scale)
+    equipment = equipment_uids(scale)
+    texts = [synthetic_text(rng) for _ in range(64)]
+    cursor = conn.cursor()
+
+    written = 0
+    while written < scale.chunks:
+        n = min(batch_size, scale.chunks - written)
+        topics = np_rng.integers(0, scale.topics, size=n)
+        vectors = synthetic_embeddings(centroids, topics, np_rng)
+        with cursor.copy(
+            """
+            COPY doc_chunks (
+                doc_id, doc_type, site_id, equipment_uid,
+                source_name, section, content, embedding
+            )
+            FROM STDIN WITH (FORMAT BINARY)
+            """
+        ) as copy:
+            copy.set_types(["text", "text", "text", "text", "text", "text", "text", "vector"])
+            for i in range(n):
+                site_id, equipment_uid = rng.choice(equipment)
+                if rng.random() < 0.2:
+                    equipment_uid = None
+                doc_no = (written + i) // 40
+                copy.write_row(
+                    (
+                        f"{DOC_PREFIX}{doc_no:07d}",
+                        "manual" if doc_no % 3 else "preventive",
+                        site_id,
+                        equipment_uid,
+                        f"bench_doc_{doc_no:07d}.txt",
+                        f"topic-{topics[i]}",
+                        texts[topics[i] % len(texts)],
+                        vectors[i],
+                    )
+                )
+        conn.commit()
+        written += n
+    return written
+
+
+def clear(conn: psycopg.Connection) -> dict:
+    like = f"{PREFIX}-%"
+    cursor = conn.cursor()
+    counts: dict[str, int] = {}
+    statements = [
+        ("doc_chunks", "DELETE FROM doc_chunks WHERE doc_id LIKE %s OR site_id LIKE %s", (f"{DOC_PREFIX}%", like)),
+        ("documents", "DELETE FROM documents WHERE site_id LIKE %s", (like,)),
+        (
+            "assignments",
+            """
+            DELETE FROM assignments
+            WHERE work_order_id IN (SELECT work_order_id FROM work_orders WHERE site_id LIKE %s)
+            """,
+            (like,),
+        ),
+        ("work_orders", "DELETE FROM work_orders WHERE site_id LIKE %s", (like,)),
+        ("inventory", "DELETE FROM inventory WHERE site_id LIKE %s", (like,)),
+        ("maintenance_schedule", "DELETE FROM maintenance_schedule WHERE site_id LIKE %s", (like,)),
+        (
+            "employee_certs",
+            "DELETE FROM employee_certs WHERE employee_id IN (SELECT employee_id FROM employees WHERE site_id LIKE %s)",
+            (like,),
+        ),
+        ("employees", "DELETE FROM employees WHERE site_id LIKE %s", (like,)),
+        ("equipment", "DELETE FROM equipment WHERE site_id LIKE %s", (like,)),
+        ("sites", "DELETE FROM sites WHERE site_id LIKE %s", (like,)),
+    ]
+    for table, sql, params in statements:
+        cursor.execute(sql, params)
+        counts[table] = cursor.rowcount
+    conn.commit()
+    return counts
@@ -0,0 +1,213 @@
+import json
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from http.client import HTTPException
+from time import perf_counter
+from typing import Callable, Optional
+from urllib.request import Request, urlopen
+
+from bench.synthetic import CERTS, PREFIX, Scale, equipment_uids, site_ids, synthetic_text
+
+CHAT_MESSAGES = [
+    "What is the troubleshoot procedure for a pump seal leak?",
+    "Show me the preventive maintenance solution for bearing vibration",
+    "What's the next maintenance for this equipment?",
+    "Show me maintenance due this week",
+    "Find qualified employees to assign to this job",
+    "Check spare part filter inventory",
+    "Create work order to schedule preventive maintenance",
+]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def summarize(name: str, latencies: list[float], errors: int, wall: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "workload": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def run_workload(name: str, send: Callable[[int], bool], requests: int, concurrency: int) -> dict:
+    def one(i: int) -> tuple[float, bool]:
+        started = perf_counter()
+        try:
+            ok = send(i)
+        except (OSError, HTTPException):
+            # URLError and timeouts are OSErrors; connection resets raised while
+            # reading the response are not wrapped by urllib.
+            ok = False
+        return perf_counter() - started, ok
+
+    latencies: list[float] = []
+    errors = 0
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, ok in pool.map(one, range(requests)):
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+    return summarize(name, latencies, errors, perf_counter() - started)
+
+
+class Client:
+    def __init__(self, base_url: str, timeout: float = 60.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[dict] = None,
+    ) -> bool:
+        req = Request(f"{self.base_url}{path}", data=body, method=method, headers=headers or {})
+        with urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+            return 200 <= resp.status < 300
+
+    def post_json(self, path: str, payload: dict, headers: Optional[dict] = None) -> bool:
+        return self.request(
+            "POST",
+            path,
+            json.dumps(payload).encode(),
+            {"Content-Type": "application/json", **(headers or {})},
+        )
+
+    def post_files(self, path: str, field: str, files: list[tuple[str, bytes]]) -> bool:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for filename, data in files:
+            parts.append(
+                (
+                    f"--{boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                    "Content-Type: application/octet-stream\r\n\r\n"
+                ).encode()
+                + data
+                + b"\r\n"
+            )
+        body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+        return self.request("POST", path, body, {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+
+def chat_workload(client: Client, scale: Scale) -> Callable[[int], bool]:
+    equipment = equipment_uids(scale)
+    today = date.today()
+
+    def send(i: int) -> bool:
+        rng = random.Random(i)
+        site_id, equipment_uid = rng.choice(equipment)
+        return client.post_json(
+            "/chat",
+            {
+                "message": rng.choice(CHAT_MESSAGES),
+                "site_id": site_id,
+                "equipment_uid": equipment_uid,
+                "date_range": {
+                    "start": today.isoformat(),
+                    "end": (today + timedelta(days=7)).isoformat(),
+                },
+            },
+        )
+
+    return send
+
+
+def ingest_docs_workload(client: Client, scale: Scale, words: int = 3000) -> Callable[[int], bool]:
+    equipment = equipment_uids(scale)
+    # Re-ingesting a known source is a cheap no-op, so every run uploads new ones.
+    nonce = uuid.uuid4().hex[:8]
+
+    def send(i: int) -> bool:
+        rng = random.Random(i)
+        site_id, equipment_uid = rng.choice(equipment)
+        text = synthetic_text(rng, words).encode()
+        return client.post_files(
+            f"/ingest/docs?doc_type=manual&site_id={site_id}&equipment_uid={equipment_uid}",
+            "files",
+            [(f"bench_upload_{nonce}_{i:06d}.txt", text)],
+        )
+
+    return send
+
+
+def ingest_csv_workload(client: Client, scale: Scale, kind: str, rows: int = 100) -> Callable[[int], bool]:
+    sites = site_ids(scale)
+    equipment = equipment_uids(scale)
+
+    def build(i: int) -> str:
+        rng = random.Random(i)
+        if kind == "employees":
+            lines = ["employee_id,site_id,name,certs"]
+            for r in range(rows):
+                certs = ",".join(rng.sample(CERTS, 2))
+                lines.append(f'{PREFIX}-L{i:05d}{r:04d},{rng.choice(sites)},Loaded Tech {r},"{certs}"')
+        elif kind == "schedules":
+            lines = ["site_id,equipment_uid,next_date,required_certs,est_duration_min"]
+            for _ in range(rows):
+                site_id, equipment_uid = rng.choice(equipment)
+                next_date = date.today() + timedelta(days=rng.randrange(scale.horizon_days))
+                lines.append(f'{site_id},{equipment_uid},{next_date},"{rng.choice(CERTS)}",{rng.choice([60, 120])}')
+        else:
+            lines = ["site_id,part_id,part_name,qty,reorder_level"]
+            for _ in range(rows):
+                part = rng.randrange(scale.parts_per_site)
+                lines.append(f"{rng.choice(sites)},PART-{part:05d},Loaded Part {part},{rng.randint(0, 50)},5")
+        return "\n".join(lines)
+
+    def send(i: int) -> bool:
+        return client.post_files(f"/ingest/csv/{kind}", "file", [(f"bench_{kind}_{i}.csv", build(i).encode())])
+
+    return send
+
+
+def workorders_workload(client: Client, scale: Scale, write_ratio: float = 0.2) -> Callable[[int], bool]:
+    equipment = equipment_uids(scale)
+
+    def send(i: int) -> bool:
+        rng = random.Random(i)
+        site_id, equipment_uid = rng.choice(equipment)
+        if rng.random() >= write_ratio:
+            return client.request("GET", f"/workorders?site_id={site_id}")
+        day = date.today() + timedelta(days=rng.randrange(scale.horizon_days))
+        start = datetime.combine(day, time(hour=8))
+        return client.post_json(
+            "/workorders/draft",
+            {
+                "site_id": site_id,
+                "equipment_uid": equipment_uid,
+                "job_type": "PREVENTIVE",
+                "planned_start": start.isoformat(),
+                "planned_end": (start + timedelta(hours=2)).isoformat(),
+                "created_by": "bench",
+            },
+            {"x-user-role": "user", "x-user-id": "bench"},
+        )
+
+    return send
+
+
+WORKLOADS = {
+    "chat": chat_workload,
+    "ingest_docs": ingest_docs_workload,
+    "ingest_csv_employees": lambda client, scale: ingest_csv_workload(client, scale, "employees"),
+    "ingest_csv_schedules": lambda client, scale: ingest_csv_workload(client, scale, "schedules"),
+    "ingest_csv_inventory": lambda client, scale: ingest_csv_workload(client, scale, "inventory"),
+    "workorders": workorders_workload,
+}
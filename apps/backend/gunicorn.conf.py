@@ -0,0 +1,43 @@
+import gc
+import multiprocessing
+import os
+
+# Production serving: gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app, the embedding model and (with VECTOR_MIRROR=true) the vector mirror
+# are loaded once in the master process and shared copy-on-write by every
+# forked worker. Each worker opens its own database pool (and mirror refresh
+# connection) on startup, after the fork.
+
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    from app.ingest.embed import _get_model
+    from app.tools import vector_index
+
+    _get_model()
+    try:
+        vector_index.preload_mirror()
+    except Exception:
+        # Workers then build their own mirror after the fork.
+        server.log.exception("Vector mirror preload failed")
+    # Move everything loaded so far out of the GC's tracked generations so
+    # collections in workers do not write to (and un-share) those pages.
+    gc.freeze()
+    server.log.info("Embedding model preloaded in master (pid %s)", os.getpid())
+
+
+def post_fork(server, worker):
+    import torch
+
+    # Split the cores between workers instead of every worker using all of them.
+    torch.set_num_threads(max(1, multiprocessing.cpu_count() // server.cfg.workers))
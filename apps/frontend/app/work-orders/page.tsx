@@ -46,6 +46,22 @@ export default function WorkOrdersPage() {
     fetchWorkOrders();
   }, [siteFilter, statusFilter]);
 
+  useEffect(() => {
+    return api.subscribeWorkOrders(siteFilter || undefined, (changed) => {
+      setWorkOrders((current) => {
+        const rest = current.filter(
+          (wo) => wo.work_order_id !== changed.work_order_id
+        );
+        if (statusFilter !== "All" && changed.status !== statusFilter) {
+          return rest;
+        }
+        return [changed, ...rest].sort((a, b) =>
+          b.created_at.localeCompare(a.created_at)
+        );
+      });
+    });
+  }, [siteFilter, statusFilter]);
+
   const handleUpdate = () => {
     setSelectedWorkOrder(null);
     fetchWorkOrders();
@@ -167,6 +167,25 @@ export const api = {
     return fetchAPI<WorkOrder[]>(`/workorders${query ? `?${query}` : ""}`);
   },
 
+  subscribeWorkOrders(
+    siteId: string | undefined,
+    onChange: (workOrder: WorkOrder) => void
+  ): () => void {
+    if (MOCK_MODE || typeof EventSource === "undefined") {
+      return () => {};
+    }
+    const params = new URLSearchParams();
+    if (siteId) params.set("site_id", siteId);
+    const query = params.toString();
+    const source = new EventSource(
+      `${API_BASE}/workorders/stream${query ? `?${query}` : ""}`
+    );
+    const handler = (event: MessageEvent) => onChange(JSON.parse(event.data));
+    source.addEventListener("insert", handler);
+    source.addEventListener("update", handler);
+    return () => source.close();
+  },
+
   async getWorkOrder(id: number): Promise<WorkOrder> {
     return fetchAPI<WorkOrder>(`/workorders/${id}`);
   },